@@ -0,0 +1,297 @@
+"""
+Capa de datos de las empresas (sin dependencias graficas)
+- Provincias, comunidades autonomas y sectores
+- Esquema SQLite versionado y migraciones
+- Funciones CRUD y de busqueda usadas por la app y por el servicio HTTP
+"""
+
+import sqlite3
+import pathlib
+from contextlib import contextmanager
+
+# ==============================================================
+# DATOS GEOGRAFICOS: provincias y sus comunidades autonomas
+# ==============================================================
+# Cada entrada: "Nombre provincia": ("Comunidad Autonoma", longitud, latitud)
+PROVINCIAS = {
+    "A Coruna":          ("Galicia",              -8.4115, 43.3623),
+    "Albacete":          ("Castilla-La Mancha",   -1.8585, 38.9943),
+    "Alicante":          ("Comunidad Valenciana", -0.4810, 38.3452),
+    "Almeria":           ("Andalucia",            -2.4637, 36.8381),
+    "Asturias":          ("Asturias",             -5.8449, 43.3614),
+    "Avila":             ("Castilla y Leon",      -4.7114, 40.6566),
+    "Badajoz":           ("Extremadura",          -6.9706, 38.8794),
+    "Barcelona":         ("Cataluna",              2.1734, 41.3851),
+    "Bizkaia":           ("Pais Vasco",           -2.9253, 43.2630),
+    "Burgos":            ("Castilla y Leon",      -3.6969, 42.3439),
+    "Caceres":           ("Extremadura",          -6.3724, 39.4753),
+    "Cadiz":             ("Andalucia",            -6.2894, 36.5271),
+    "Cantabria":         ("Cantabria",            -3.8044, 43.4623),
+    "Castellon":         ("Comunidad Valenciana", -0.0524, 39.9864),
+    "Ceuta":             ("Ceuta",                -5.3162, 35.8894),
+    "Ciudad Real":       ("Castilla-La Mancha",   -3.9289, 38.9848),
+    "Cordoba":           ("Andalucia",            -4.7794, 37.8882),
+    "Cuenca":            ("Castilla-La Mancha",   -2.1374, 40.0704),
+    "Gipuzkoa":          ("Pais Vasco",           -2.0000, 43.1500),
+    "Girona":            ("Cataluna",              2.8214, 41.9794),
+    "Granada":           ("Andalucia",            -3.5986, 37.1773),
+    "Guadalajara":       ("Castilla-La Mancha",   -3.1614, 40.6322),
+    "Huelva":            ("Andalucia",            -6.9447, 37.2614),
+    "Huesca":            ("Aragon",               -0.4082, 42.1401),
+    "Illes Balears":     ("Islas Baleares",        2.6502, 39.5696),
+    "Jaen":              ("Andalucia",            -3.7903, 37.7796),
+    "La Rioja":          ("La Rioja",             -2.4450, 42.4650),
+    "Las Palmas":        ("Canarias",            -15.4138, 28.1235),
+    "Leon":              ("Castilla y Leon",      -5.5671, 42.5987),
+    "Lleida":            ("Cataluna",              0.6217, 41.6148),
+    "Lugo":              ("Galicia",              -7.5560, 43.0097),
+    "Madrid":            ("Madrid",               -3.7038, 40.4168),
+    "Malaga":            ("Andalucia",            -4.4214, 36.7213),
+    "Melilla":           ("Melilla",              -2.9388, 35.2923),
+    "Murcia":            ("Murcia",               -1.1307, 37.9922),
+    "Navarra":           ("Navarra",              -1.6440, 42.8125),
+    "Ourense":           ("Galicia",              -7.8640, 42.3360),
+    "Palencia":          ("Castilla y Leon",      -4.5288, 42.0097),
+    "Pontevedra":        ("Galicia",              -8.6455, 42.4337),
+    "Salamanca":         ("Castilla y Leon",      -5.6640, 40.9701),
+    "Santa Cruz de Tenerife": ("Canarias",       -16.2519, 28.4636),
+    "Segovia":           ("Castilla y Leon",      -4.1184, 40.9429),
+    "Sevilla":           ("Andalucia",            -5.9845, 37.3891),
+    "Soria":             ("Castilla y Leon",      -2.4638, 41.7636),
+    "Tarragona":         ("Cataluna",              1.2445, 41.1189),
+    "Teruel":            ("Aragon",               -1.1065, 40.3456),
+    "Toledo":            ("Castilla-La Mancha",   -4.0273, 39.8628),
+    "Valencia":          ("Comunidad Valenciana", -0.3763, 39.4699),
+    "Valladolid":        ("Castilla y Leon",      -4.7245, 41.6523),
+    "Zamora":            ("Castilla y Leon",      -5.7448, 41.5036),
+    "Zaragoza":          ("Aragon",               -0.8773, 41.6561),
+    "Alava":             ("Pais Vasco",           -2.6726, 42.8467),
+    "Otra":              (None,                    None,   None),
+}
+
+NOMBRES_PROVINCIAS = list(PROVINCIAS.keys())
+
+SECTORES = [
+    "Satelites", "Defensa y Espacio",
+    "Comunicaciones", "Aeronautica",
+    "Tecnologia", "Consultoria",
+    "Energia", "Otro"
+]
+
+DB_PATH = str(pathlib.Path(__file__).parent / "empresas.db")
+
+
+# ==============================================================
+# BASE DE DATOS + MIGRACION AUTOMATICA
+# ==============================================================
+# Version del esquema guardada en PRAGMA user_version. Las BD que ya
+# estan en esta version arrancan sin consultar sqlite_master ni table_info.
+VERSION_ESQUEMA = 1
+
+def _crear_tabla(cur):
+    cur.execute("""
+        CREATE TABLE empresas (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre      TEXT NOT NULL,
+            sector      TEXT,
+            provincia   TEXT,
+            comunidad   TEXT,
+            latitud     REAL NOT NULL,
+            longitud    REAL NOT NULL,
+            link_empleados TEXT
+        )
+    """)
+
+def _migrar_v1(cur):
+    """
+    BD sin version (anterior a user_version): crea la tabla o, si ya
+    existia con el campo 'ciudad', anade 'provincia' y 'comunidad' sin
+    borrar datos. La comunidad se rellena con un unico UPDATE contra una
+    tabla temporal provincia -> comunidad construida desde PROVINCIAS.
+    """
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='empresas'")
+    if cur.fetchone() is None:
+        _crear_tabla(cur)
+        return
+
+    cur.execute("PRAGMA table_info(empresas)")
+    columnas = [row[1] for row in cur.fetchall()]
+
+    # --- si tiene 'ciudad' pero no 'provincia' ---
+    if "ciudad" in columnas and "provincia" not in columnas:
+        print("Migrando base de datos al nuevo esquema...")
+        cur.execute("ALTER TABLE empresas ADD COLUMN provincia TEXT")
+        cur.execute("ALTER TABLE empresas ADD COLUMN comunidad TEXT")
+        cur.execute("CREATE TEMP TABLE provincia_comunidad (provincia TEXT PRIMARY KEY, comunidad TEXT NOT NULL)")
+        cur.executemany(
+            "INSERT INTO provincia_comunidad VALUES (?,?)",
+            [(prov, datos[0]) for prov, datos in PROVINCIAS.items() if datos[0]]
+        )
+        # Una sola pasada: copia 'ciudad' y resuelve la comunidad a la vez
+        cur.execute("""
+            UPDATE empresas SET
+                provincia = ciudad,
+                comunidad = (
+                    SELECT pc.comunidad FROM provincia_comunidad pc
+                    WHERE pc.provincia = empresas.ciudad
+                )
+        """)
+        cur.execute("DROP TABLE temp.provincia_comunidad")
+        print("Migracion completada. Revisa las empresas para confirmar provincia/comunidad.")
+
+    # --- si no tiene latitud/longitud (muy antigua) ---
+    if "latitud" not in columnas:
+        cur.execute("ALTER TABLE empresas ADD COLUMN latitud REAL")
+    if "longitud" not in columnas:
+        cur.execute("ALTER TABLE empresas ADD COLUMN longitud REAL")
+
+# Migraciones en orden: (version resultante, funcion(cursor)).
+# Para cambiar el esquema, anadir una entrada y subir VERSION_ESQUEMA.
+MIGRACIONES = [
+    (1, _migrar_v1),
+]
+
+def init_db():
+    """
+    Lleva la BD a VERSION_ESQUEMA. Si user_version ya es esa (o una
+    posterior, escrita por una version mas nueva del programa) no hace
+    nada mas; si no, aplica las migraciones pendientes en una unica
+    transaccion y guarda la nueva version.
+    """
+    con = sqlite3.connect(DB_PATH, isolation_level=None)
+    try:
+        cur = con.cursor()
+        if cur.execute("PRAGMA user_version").fetchone()[0] >= VERSION_ESQUEMA:
+            return
+
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            # Releer dentro de la transaccion por si otro proceso ya migro
+            inicial = version = cur.execute("PRAGMA user_version").fetchone()[0]
+            for destino, migrar in MIGRACIONES:
+                if version < destino:
+                    migrar(cur)
+                    version = destino
+            if version != inicial:
+                cur.execute(f"PRAGMA user_version = {version}")
+            cur.execute("COMMIT")
+        except BaseException:
+            cur.execute("ROLLBACK")
+            raise
+    finally:
+        con.close()
+
+COLUMNAS_EMPRESA = (
+    "id", "nombre", "sector", "provincia", "comunidad",
+    "latitud", "longitud", "link_empleados",
+)
+_SELECT_EMPRESAS = "SELECT " + ", ".join(COLUMNAS_EMPRESA) + " FROM empresas"
+
+@contextmanager
+def _conexion(con=None):
+    """Usa la conexion recibida o abre (y cierra) una propia sobre DB_PATH.
+    Permite que el servidor HTTP reutilice sus conexiones del pool.
+    Si algo falla se deshace la transaccion en curso, para no dejar
+    bloqueada la BD cuando la conexion es compartida."""
+    propia = con is None
+    if propia:
+        con = sqlite3.connect(DB_PATH)
+    try:
+        yield con
+    except BaseException:
+        con.rollback()
+        raise
+    finally:
+        if propia:
+            con.close()
+
+def get_all(con=None):
+    with _conexion(con) as con:
+        cur = con.cursor()
+        cur.execute(_SELECT_EMPRESAS + " ORDER BY nombre")
+        return cur.fetchall()
+
+def get_empresa(emp_id, con=None):
+    """Devuelve la fila de una empresa por id, o None si no existe."""
+    with _conexion(con) as con:
+        cur = con.cursor()
+        cur.execute(_SELECT_EMPRESAS + " WHERE id=?", (emp_id,))
+        return cur.fetchone()
+
+def buscar_empresas(con, sector=None, provincia=None, bbox=None, limit=None, offset=0):
+    """
+    Cursor con las empresas filtradas por sector, provincia y/o
+    bbox (min_lon, min_lat, max_lon, max_lat), ordenadas por nombre.
+    Se devuelve el cursor para poder leer las filas por lotes.
+    """
+    condiciones, params = [], []
+    if sector:
+        condiciones.append("sector=?")
+        params.append(sector)
+    if provincia:
+        condiciones.append("provincia=?")
+        params.append(provincia)
+    if bbox:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        condiciones.append("longitud BETWEEN ? AND ? AND latitud BETWEEN ? AND ?")
+        params.extend((min_lon, max_lon, min_lat, max_lat))
+    sql = _SELECT_EMPRESAS
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+    sql += " ORDER BY nombre, id LIMIT ? OFFSET ?"
+    params.extend((-1 if limit is None else limit, offset))
+    return con.execute(sql, params)
+
+def get_en_bbox(bbox, con=None):
+    """Empresas dentro de bbox (min_lon, min_lat, max_lon, max_lat)."""
+    with _conexion(con) as con:
+        return buscar_empresas(con, bbox=bbox).fetchall()
+
+def get_sectores(con=None):
+    """Sectores distintos presentes en la BD, ordenados."""
+    with _conexion(con) as con:
+        cur = con.cursor()
+        cur.execute(
+            "SELECT DISTINCT sector FROM empresas "
+            "WHERE sector IS NOT NULL AND sector != '' ORDER BY sector"
+        )
+        return [row[0] for row in cur.fetchall()]
+
+def contar_por_provincia(con=None):
+    """Numero de empresas por provincia: {provincia: n}."""
+    with _conexion(con) as con:
+        cur = con.cursor()
+        cur.execute("SELECT provincia, COUNT(*) FROM empresas GROUP BY provincia")
+        return dict(cur.fetchall())
+
+def insert_empresa(nombre, sector, provincia, comunidad, lat, lon, link, con=None):
+    """Inserta una empresa y devuelve su nuevo id."""
+    with _conexion(con) as con:
+        cur = con.cursor()
+        cur.execute(
+            "INSERT INTO empresas (nombre, sector, provincia, comunidad, latitud, longitud, link_empleados) "
+            "VALUES (?,?,?,?,?,?,?)",
+            (nombre, sector, provincia, comunidad, lat, lon, link)
+        )
+        con.commit()
+        return cur.lastrowid
+
+def delete_empresa(emp_id, con=None):
+    """Elimina una empresa. Devuelve True si existia."""
+    with _conexion(con) as con:
+        cur = con.cursor()
+        cur.execute("DELETE FROM empresas WHERE id=?", (emp_id,))
+        con.commit()
+        return cur.rowcount > 0
+
+def update_empresa(emp_id, nombre, sector, provincia, comunidad, lat, lon, link, con=None):
+    """Actualiza una empresa. Devuelve True si existia."""
+    with _conexion(con) as con:
+        cur = con.cursor()
+        cur.execute(
+            "UPDATE empresas SET nombre=?, sector=?, provincia=?, comunidad=?, "
+            "latitud=?, longitud=?, link_empleados=? WHERE id=?",
+            (nombre, sector, provincia, comunidad, lat, lon, link, emp_id)
+        )
+        con.commit()
+        return cur.rowcount > 0
@@ -0,0 +1,107 @@
+"""
+Benchmark de la migracion de esquema (base_datos.init_db)
+- Genera una BD antigua (campo 'ciudad', sin user_version) con N filas
+- Mide la migracion versionada en una sola transaccion
+- Mide, sobre una copia identica, la migracion antigua fila a fila
+  (un UPDATE ... WHERE id=? por empresa) y comprueba que el resultado
+  es el mismo
+- Mide un arranque con la BD ya en VERSION_ESQUEMA (camino rapido)
+
+Uso:
+    python bench_migracion.py --filas 1000000
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+import base_datos
+from base_datos import PROVINCIAS, NOMBRES_PROVINCIAS, init_db
+
+
+def crear_bd_antigua(path, filas):
+    con = sqlite3.connect(path)
+    con.execute("""
+        CREATE TABLE empresas (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre      TEXT NOT NULL,
+            sector      TEXT,
+            ciudad      TEXT,
+            latitud     REAL NOT NULL,
+            longitud    REAL NOT NULL,
+            link_empleados TEXT
+        )
+    """)
+    # Incluye una provincia desconocida para cubrir filas sin comunidad
+    ciudades = NOMBRES_PROVINCIAS + ["Desconocida"]
+    con.executemany(
+        "INSERT INTO empresas (nombre, sector, ciudad, latitud, longitud, link_empleados) "
+        "VALUES (?,?,?,?,?,?)",
+        ((f"Empresa {i}", "Otro", ciudades[i % len(ciudades)], 40.0, -3.7, "")
+         for i in range(filas))
+    )
+    con.commit()
+    con.close()
+
+
+def migrar_fila_a_fila(path):
+    """Migracion 'ciudad' -> 'provincia' tal como se hacia antes del versionado."""
+    con = sqlite3.connect(path)
+    cur = con.cursor()
+    cur.execute("ALTER TABLE empresas ADD COLUMN provincia TEXT")
+    cur.execute("ALTER TABLE empresas ADD COLUMN comunidad TEXT")
+    cur.execute("UPDATE empresas SET provincia = ciudad")
+    cur.execute("SELECT id, provincia FROM empresas")
+    for emp_id, prov in cur.fetchall():
+        datos = PROVINCIAS.get(prov)
+        if datos and datos[0]:
+            cur.execute("UPDATE empresas SET comunidad=? WHERE id=?", (datos[0], emp_id))
+    con.commit()
+    con.close()
+
+
+def _cronometrar(funcion):
+    t0 = time.perf_counter()
+    funcion()
+    return time.perf_counter() - t0
+
+
+def _contenido(path):
+    con = sqlite3.connect(path)
+    filas = con.execute("SELECT id, provincia, comunidad FROM empresas ORDER BY id").fetchall()
+    con.close()
+    return filas
+
+
+def main(filas):
+    carpeta = tempfile.mkdtemp(prefix="bench_migracion_")
+    try:
+        original = os.path.join(carpeta, "antigua.db")
+        print(f"Generando BD antigua con {filas} filas...")
+        crear_bd_antigua(original, filas)
+        nueva = os.path.join(carpeta, "nueva.db")
+        referencia = os.path.join(carpeta, "referencia.db")
+        shutil.copy(original, nueva)
+        shutil.copy(original, referencia)
+
+        base_datos.DB_PATH = nueva
+        t_nueva = _cronometrar(init_db)
+        t_ref = _cronometrar(lambda: migrar_fila_a_fila(referencia))
+        t_rapido = _cronometrar(init_db)
+
+        print(f"Migracion versionada (set-based): {t_nueva:.2f} s")
+        print(f"Migracion antigua fila a fila:    {t_ref:.2f} s")
+        print(f"Arranque con BD ya migrada:       {t_rapido * 1000:.2f} ms")
+        print("Resultado identico:", _contenido(nueva) == _contenido(referencia))
+    finally:
+        shutil.rmtree(carpeta)
+
+
+# ==============================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la migracion de esquema")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    main(parser.parse_args().filas)
@@ -0,0 +1,191 @@
+"""
+Prueba de carga del servicio HTTP local (servidor_empresas.py)
+- Cliente asyncio de la libreria estandar, conexiones keep-alive
+- Mezcla de listados por bbox/sector, consultas por id y escrituras
+- Opcionalmente, un escritor externo que usa la BD directamente (como
+  la app Tk) para comprobar que WAL permite escribir durante la carga
+
+Uso (con el servicio ya arrancado en otra terminal):
+    python servidor_empresas.py --db /tmp/carga.db
+    python prueba_carga.py --db /tmp/carga.db --sembrar 2000 --conexiones 50 --peticiones 5000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+
+import base_datos
+from base_datos import SECTORES, PROVINCIAS, insert_empresa, delete_empresa
+
+PROVINCIAS_CON_COORDENADAS = [p for p, datos in PROVINCIAS.items() if datos[1] is not None]
+
+
+class Cliente:
+    """Una conexion HTTP/1.1 keep-alive contra el servicio."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def peticion(self, metodo, ruta, cuerpo=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        datos = json.dumps(cuerpo).encode("utf-8") if cuerpo is not None else b""
+        self.writer.write(
+            f"{metodo} {ruta} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Length: {len(datos)}\r\n\r\n".encode("latin-1") + datos
+        )
+        await self.writer.drain()
+        linea = await self.reader.readline()
+        if not linea:
+            raise ConnectionResetError("el servidor cerro la conexion")
+        estado = int(linea.split()[1])
+        cabeceras = {}
+        while True:
+            linea = await self.reader.readline()
+            if linea in (b"\r\n", b""):
+                break
+            clave, _, valor = linea.decode("latin-1").partition(":")
+            cabeceras[clave.strip().lower()] = valor.strip()
+        if cabeceras.get("transfer-encoding") == "chunked":
+            partes = []
+            while True:
+                tam = int((await self.reader.readline()).strip(), 16)
+                partes.append(await self.reader.readexactly(tam + 2))
+                if tam == 0:
+                    break
+            cuerpo = b"".join(p[:-2] for p in partes)
+        else:
+            cuerpo = await self.reader.readexactly(int(cabeceras.get("content-length", 0)))
+        if cabeceras.get("connection", "").lower() == "close":
+            self.cerrar()
+        return estado, json.loads(cuerpo) if cuerpo else None
+
+    def cerrar(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def _empresa_aleatoria(i):
+    prov = random.choice(PROVINCIAS_CON_COORDENADAS)
+    _, lon, lat = PROVINCIAS[prov]
+    return {
+        "nombre": f"Carga {i}", "sector": random.choice(SECTORES), "provincia": prov,
+        "latitud": lat + random.uniform(-0.3, 0.3), "longitud": lon + random.uniform(-0.3, 0.3),
+    }
+
+def _peticion_aleatoria(ids, prop_escrituras, i):
+    if ids and random.random() < prop_escrituras:
+        if random.random() < 0.5:
+            return "POST", "/empresas", _empresa_aleatoria(i)
+        return "PUT", f"/empresas/{random.choice(ids)}", _empresa_aleatoria(i)
+    r = random.random()
+    if ids and r < 0.4:
+        return "GET", f"/empresas/{random.choice(ids)}", None
+    if r < 0.7:
+        lon, lat = random.uniform(-9, 3), random.uniform(36, 43)
+        return "GET", f"/empresas?bbox={lon},{lat},{lon + 1.5},{lat + 1.5}&limit=200", None
+    return "GET", "/empresas?" + urlencode({"sector": random.choice(SECTORES), "limit": 100}), None
+
+
+async def _trabajador(host, port, ids, prop_escrituras, cola, latencias, errores):
+    cliente = Cliente(host, port)
+    try:
+        while True:
+            try:
+                i = cola.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            metodo, ruta, cuerpo = _peticion_aleatoria(ids, prop_escrituras, i)
+            t0 = time.perf_counter()
+            try:
+                estado, _ = await cliente.peticion(metodo, ruta, cuerpo)
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+                errores[type(e).__name__] = errores.get(type(e).__name__, 0) + 1
+                cliente.cerrar()
+                continue
+            latencias.append(time.perf_counter() - t0)
+            if estado >= 500:
+                errores[estado] = errores.get(estado, 0) + 1
+    finally:
+        cliente.cerrar()
+
+
+def _escritor_externo(parar, resultado):
+    """Inserta y borra empresas con conexiones propias, como hace la app Tk."""
+    while not parar.is_set():
+        try:
+            emp_id = insert_empresa("Externa", "Otro", "Madrid", "Madrid", 40.4, -3.7, "")
+            delete_empresa(emp_id)
+            resultado["ok"] += 1
+        except sqlite3.OperationalError:
+            resultado["bloqueos"] += 1
+        time.sleep(0.01)
+
+
+def _percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p))] * 1000
+
+
+async def main(args):
+    cliente = Cliente(args.host, args.port)
+    for i in range(args.sembrar):
+        await cliente.peticion("POST", "/empresas", _empresa_aleatoria(i))
+    _, datos = await cliente.peticion("GET", "/empresas?limit=1000")
+    cliente.cerrar()
+    ids = [e["id"] for e in datos["empresas"]]
+
+    cola = asyncio.Queue()
+    for i in range(args.peticiones):
+        cola.put_nowait(i)
+    latencias, errores = [], {}
+    externo = {"ok": 0, "bloqueos": 0}
+    parar = threading.Event()
+    hilo = None
+    if args.db:
+        base_datos.DB_PATH = args.db
+        hilo = threading.Thread(target=_escritor_externo, args=(parar, externo))
+        hilo.start()
+
+    t0 = time.perf_counter()
+    try:
+        await asyncio.gather(*[
+            _trabajador(args.host, args.port, ids, args.escrituras, cola, latencias, errores)
+            for _ in range(args.conexiones)
+        ])
+    finally:
+        duracion = time.perf_counter() - t0
+        parar.set()
+        if hilo:
+            hilo.join()
+
+    latencias.sort()
+    print(f"Peticiones: {len(latencias)} en {duracion:.2f} s -> {len(latencias) / duracion:.0f} pet/s")
+    if latencias:
+        print(f"Latencia ms: p50={_percentil(latencias, 0.50):.1f}  "
+              f"p95={_percentil(latencias, 0.95):.1f}  p99={_percentil(latencias, 0.99):.1f}")
+    print(f"Errores: {errores or 'ninguno'}")
+    if hilo:
+        print(f"Escritor externo: {externo['ok']} escrituras, {externo['bloqueos']} 'database is locked'")
+
+
+# ==============================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de empresas en localhost")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--conexiones", type=int, default=50, help="clientes concurrentes")
+    parser.add_argument("--peticiones", type=int, default=5000, help="peticiones totales")
+    parser.add_argument("--escrituras", type=float, default=0.1,
+                        help="proporcion de peticiones POST/PUT")
+    parser.add_argument("--sembrar", type=int, default=0,
+                        help="empresas a crear antes de empezar")
+    parser.add_argument("--db", default=None,
+                        help="BD del servicio: activa un escritor externo directo durante la carga")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,405 @@
+"""
+Servicio HTTP/JSON local sobre empresas.db
+- Permite consultar la misma base de datos desde scripts y dashboards
+- Lecturas servidas desde un pool de conexiones SQLite de solo lectura (WAL)
+- Escrituras serializadas a traves de una unica conexion escritora
+- Listados filtrables por sector, provincia y bbox, paginados y enviados
+  en streaming (JSON por trozos)
+
+Uso:
+    python servidor_empresas.py --host 127.0.0.1 --port 8765
+
+Endpoints:
+    GET    /empresas?sector=&provincia=&bbox=minlon,minlat,maxlon,maxlat&limit=&offset=
+    GET    /empresas/<id>
+    POST   /empresas
+    PUT    /empresas/<id>
+    DELETE /empresas/<id>
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import pathlib
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+import base_datos
+from base_datos import (
+    DB_PATH, PROVINCIAS, COLUMNAS_EMPRESA, init_db,
+    get_empresa, buscar_empresas, insert_empresa, update_empresa, delete_empresa,
+)
+
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO      = 1000
+FILAS_POR_TROZO    = 200
+MAX_CUERPO         = 1024 * 1024
+MAX_CABECERAS      = 100
+TIMEOUT_LECTURA    = 30    # segundos para recibir una peticion completa
+TIMEOUT_ESCRITURA  = 10    # segundos maximos enviando una respuesta al cliente
+
+RAZONES = {
+    200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large",
+    431: "Request Header Fields Too Large", 500: "Internal Server Error",
+}
+
+
+class ErrorHTTP(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+
+
+def _fila_a_dict(row):
+    return dict(zip(COLUMNAS_EMPRESA, row))
+
+
+# ==============================================================
+# CONEXIONES: pool de lectores + escritor unico
+# ==============================================================
+class PoolSQLite:
+    """
+    Un escritor y N lectores de solo lectura sobre la misma BD en modo WAL.
+    Cada conexion se usa desde un hilo del executor, nunca a la vez por
+    dos peticiones: los lectores se prestan a traves de una cola y el
+    escritor tiene su propio executor de un solo hilo.
+    """
+
+    def __init__(self, db_path=DB_PATH, lectores=4):
+        self.db_path = db_path
+        self.num_lectores = lectores
+        self._escritor = None
+        self._lectores = None
+        self._exec_lectura = ThreadPoolExecutor(lectores, thread_name_prefix="lector")
+        self._exec_escritura = ThreadPoolExecutor(1, thread_name_prefix="escritor")
+
+    def abrir(self):
+        self._escritor = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._escritor.execute("PRAGMA journal_mode=WAL")
+        self._escritor.execute("PRAGMA synchronous=NORMAL")
+        self._lectores = asyncio.Queue()
+        # as_uri() escapa '#', '?' y '%' de la ruta, que SQLite leeria como parte de la URI
+        uri = pathlib.Path(self.db_path).resolve().as_uri() + "?mode=ro"
+        for _ in range(self.num_lectores):
+            con = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._lectores.put_nowait(con)
+
+    async def cerrar(self):
+        for _ in range(self.num_lectores):
+            (await self._lectores.get()).close()
+        self._exec_lectura.shutdown()
+        self._exec_escritura.shutdown()
+        self._escritor.close()
+
+    async def leer(self, funcion, *args):
+        """Ejecuta funcion(con, *args) con un lector prestado del pool."""
+        con = await self._lectores.get()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._exec_lectura, funcion, con, *args)
+        finally:
+            self._lectores.put_nowait(con)
+
+    async def escribir(self, funcion, *args):
+        """Ejecuta funcion(*args, con=escritor) en el hilo escritor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._exec_escritura, lambda: funcion(*args, con=self._escritor)
+        )
+
+    async def prestar_lector(self):
+        return await self._lectores.get()
+
+    def devolver_lector(self, con):
+        self._lectores.put_nowait(con)
+
+    def en_hilo_lector(self, funcion, *args):
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._exec_lectura, funcion, *args)
+
+
+# ==============================================================
+# VALIDACION DE PARAMETROS Y CUERPOS
+# ==============================================================
+def _entero(valor, nombre, minimo=0):
+    try:
+        n = int(valor)
+    except (TypeError, ValueError):
+        raise ErrorHTTP(400, f"'{nombre}' debe ser un entero")
+    if n < minimo:
+        raise ErrorHTTP(400, f"'{nombre}' debe ser >= {minimo}")
+    return n
+
+def _parse_filtros(query):
+    params = {k: v[-1] for k, v in parse_qs(query).items()}
+    bbox = None
+    if params.get("bbox"):
+        try:
+            bbox = tuple(float(x) for x in params["bbox"].split(","))
+        except ValueError:
+            bbox = ()
+        if len(bbox) != 4:
+            raise ErrorHTTP(400, "'bbox' debe ser min_lon,min_lat,max_lon,max_lat")
+    limit = _entero(params.get("limit", LIMITE_POR_DEFECTO), "limit", 1)
+    return {
+        "sector":    params.get("sector") or None,
+        "provincia": params.get("provincia") or None,
+        "bbox":      bbox,
+        "limit":     min(limit, LIMITE_MAXIMO),
+        "offset":    _entero(params.get("offset", 0), "offset"),
+    }
+
+def _parse_empresa(cuerpo):
+    """Valida el JSON de una empresa con las mismas reglas que el formulario."""
+    try:
+        datos = json.loads(cuerpo or b"{}")
+    except ValueError:
+        raise ErrorHTTP(400, "Cuerpo JSON invalido")
+    if not isinstance(datos, dict):
+        raise ErrorHTTP(400, "Se esperaba un objeto JSON")
+    nombre = str(datos.get("nombre") or "").strip()
+    provincia = str(datos.get("provincia") or "").strip()
+    if not nombre:
+        raise ErrorHTTP(400, "El nombre de la empresa es obligatorio.")
+    if not provincia:
+        raise ErrorHTTP(400, "Selecciona una provincia.")
+    try:
+        lat = float(datos["latitud"])
+        lon = float(datos["longitud"])
+    except (KeyError, TypeError, ValueError):
+        raise ErrorHTTP(400, "Latitud y longitud son obligatorias y deben ser numeros decimales.")
+    if not (math.isfinite(lat) and math.isfinite(lon)):
+        raise ErrorHTTP(400, "Latitud y longitud deben ser numeros finitos.")
+    comunidad = str(datos.get("comunidad") or "").strip()
+    if not comunidad:
+        comunidad = (PROVINCIAS.get(provincia) or (None,))[0] or ""
+    return (nombre, str(datos.get("sector") or ""), provincia, comunidad,
+            lat, lon, str(datos.get("link_empleados") or "").strip())
+
+
+# ==============================================================
+# SERVIDOR HTTP
+# ==============================================================
+class Respuesta:
+    """
+    Escribe una respuesta HTTP sobre el writer de la conexion.
+    Recuerda si ya se enviaron las cabeceras: a partir de ahi un error
+    ya no puede responderse y solo queda cerrar la conexion.
+    En HTTP/1.0 no hay chunked: el cuerpo termina al cerrar.
+    """
+
+    def __init__(self, writer, chunked=True, cerrar=False):
+        self.writer  = writer
+        self.chunked = chunked
+        self.cerrar  = cerrar
+        self.enviada = False
+
+    def cabecera(self, estado, extra):
+        lineas = [f"HTTP/1.1 {estado} {RAZONES.get(estado, '')}",
+                  "Content-Type: application/json; charset=utf-8"]
+        lineas += [f"{k}: {v}" for k, v in extra]
+        if self.cerrar:
+            lineas.append("Connection: close")
+        self.writer.write(("\r\n".join(lineas) + "\r\n\r\n").encode("latin-1"))
+        self.enviada = True
+
+    def empezar_streaming(self):
+        self.cabecera(200, [("Transfer-Encoding", "chunked")] if self.chunked else [])
+
+    def trozo(self, texto):
+        datos = texto.encode("utf-8")
+        if self.chunked:
+            self.writer.write(b"%x\r\n%s\r\n" % (len(datos), datos))
+        else:
+            self.writer.write(datos)
+
+    def terminar_streaming(self):
+        if self.chunked:
+            self.writer.write(b"0\r\n\r\n")
+
+    async def drain(self, timeout=TIMEOUT_ESCRITURA):
+        await asyncio.wait_for(self.writer.drain(), max(timeout, 0))
+
+    async def json(self, estado, cuerpo):
+        datos = json.dumps(cuerpo).encode("utf-8")
+        self.cabecera(estado, [("Content-Length", len(datos))])
+        self.writer.write(datos)
+        await self.drain()
+
+
+class ServidorEmpresas:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def atender(self, reader, writer):
+        """Bucle de una conexion: admite keep-alive de HTTP/1.1.
+        Las conexiones HTTP/1.0 se cierran tras cada respuesta."""
+        try:
+            while True:
+                try:
+                    peticion = await asyncio.wait_for(self._leer_peticion(reader), TIMEOUT_LECTURA)
+                except ErrorHTTP as e:
+                    # Cuerpo sin leer: se responde y se cierra la conexion
+                    await Respuesta(writer, cerrar=True).json(e.estado, {"error": e.mensaje})
+                    break
+                if peticion is None:
+                    break
+                metodo, ruta, version, cabeceras, cuerpo = peticion
+                http11 = version == "HTTP/1.1"
+                cerrar = not http11 or cabeceras.get("connection", "").lower() == "close"
+                resp = Respuesta(writer, chunked=http11, cerrar=cerrar)
+                try:
+                    await self._despachar(resp, metodo, ruta, cuerpo)
+                except (ConnectionError, asyncio.TimeoutError):
+                    raise
+                except Exception as e:
+                    if resp.enviada:
+                        # Fallo a mitad del cuerpo: no se puede mandar otra respuesta
+                        print(f"Error enviando {metodo} {ruta}: {e!r}")
+                        break
+                    if isinstance(e, ErrorHTTP):
+                        await resp.json(e.estado, {"error": e.mensaje})
+                    elif isinstance(e, sqlite3.Error):
+                        await resp.json(500, {"error": str(e)})
+                    else:
+                        print(f"Error atendiendo {metodo} {ruta}: {e!r}")
+                        await resp.json(500, {"error": "Error interno del servidor"})
+                if cerrar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _leer_linea(reader, estado, mensaje):
+        """readline() lanza ValueError si la linea supera el limite del StreamReader (64 KiB)."""
+        try:
+            return await reader.readline()
+        except ValueError:
+            raise ErrorHTTP(estado, mensaje)
+
+    async def _leer_peticion(self, reader):
+        linea = await self._leer_linea(reader, 400, "Linea de peticion demasiado larga")
+        if not linea:
+            return None
+        try:
+            metodo, ruta, version = linea.decode("latin-1").split()
+        except ValueError:
+            raise ErrorHTTP(400, "Linea de peticion invalida")
+        cabeceras = {}
+        while True:
+            linea = await self._leer_linea(reader, 431, "Cabecera demasiado larga")
+            if linea in (b"\r\n", b"\n", b""):
+                break
+            if len(cabeceras) >= MAX_CABECERAS:
+                raise ErrorHTTP(431, "Demasiadas cabeceras")
+            clave, _, valor = linea.decode("latin-1").partition(":")
+            cabeceras[clave.strip().lower()] = valor.strip()
+        try:
+            longitud = int(cabeceras.get("content-length") or 0)
+        except ValueError:
+            raise ErrorHTTP(400, "Content-Length invalido")
+        if longitud < 0:
+            raise ErrorHTTP(400, "Content-Length invalido")
+        if longitud > MAX_CUERPO:
+            raise ErrorHTTP(413, "Cuerpo demasiado grande")
+        cuerpo = await reader.readexactly(longitud) if longitud else b""
+        return metodo.upper(), ruta, version.upper(), cabeceras, cuerpo
+
+    async def _despachar(self, resp, metodo, ruta, cuerpo):
+        partes = urlsplit(ruta)
+        segmentos = [s for s in partes.path.split("/") if s]
+        if not segmentos or segmentos[0] != "empresas" or len(segmentos) > 2:
+            raise ErrorHTTP(404, "Ruta no encontrada")
+
+        if len(segmentos) == 1:
+            if metodo == "GET":
+                return await self._listar(resp, _parse_filtros(partes.query))
+            if metodo == "POST":
+                emp_id = await self.pool.escribir(insert_empresa, *_parse_empresa(cuerpo))
+                fila = await self.pool.leer(lambda con: get_empresa(emp_id, con))
+                return await resp.json(201, _fila_a_dict(fila))
+            raise ErrorHTTP(405, "Metodo no permitido")
+
+        emp_id = _entero(segmentos[1], "id")
+        if metodo == "GET":
+            fila = await self.pool.leer(lambda con: get_empresa(emp_id, con))
+        elif metodo == "PUT":
+            if not await self.pool.escribir(update_empresa, emp_id, *_parse_empresa(cuerpo)):
+                raise ErrorHTTP(404, "Empresa no encontrada")
+            fila = await self.pool.leer(lambda con: get_empresa(emp_id, con))
+        elif metodo == "DELETE":
+            if not await self.pool.escribir(delete_empresa, emp_id):
+                raise ErrorHTTP(404, "Empresa no encontrada")
+            return await resp.json(200, {"id": emp_id, "eliminada": True})
+        else:
+            raise ErrorHTTP(405, "Metodo no permitido")
+        if fila is None:
+            raise ErrorHTTP(404, "Empresa no encontrada")
+        await resp.json(200, _fila_a_dict(fila))
+
+    async def _listar(self, resp, filtros):
+        """Envia el listado por trozos a medida que se leen las filas, sin
+        materializar la pagina entera en memoria. El lector del pool queda
+        prestado como mucho TIMEOUT_ESCRITURA segundos: un cliente lento no
+        puede acaparar las conexiones de lectura."""
+        loop = asyncio.get_running_loop()
+        limite = loop.time() + TIMEOUT_ESCRITURA
+        con = await self.pool.prestar_lector()
+        cur = None
+        try:
+            cur = await self.pool.en_hilo_lector(lambda: buscar_empresas(con, **filtros))
+            resp.empezar_streaming()
+            cabeza = json.dumps({"limit": filtros["limit"], "offset": filtros["offset"]})
+            resp.trozo(cabeza[:-1] + ', "empresas": [')
+            primero = True
+            while True:
+                filas = await self.pool.en_hilo_lector(cur.fetchmany, FILAS_POR_TROZO)
+                if not filas:
+                    break
+                texto = ",".join(json.dumps(_fila_a_dict(f)) for f in filas)
+                resp.trozo(texto if primero else "," + texto)
+                primero = False
+                await resp.drain(limite - loop.time())
+            resp.trozo("]}")
+            resp.terminar_streaming()
+            await resp.drain(limite - loop.time())
+        finally:
+            # Cerrar el cursor libera la lectura en curso antes de devolver la conexion
+            if cur is not None:
+                cur.close()
+            self.pool.devolver_lector(con)
+
+
+async def servir(host="127.0.0.1", port=8765, lectores=4, db_path=DB_PATH):
+    pool = PoolSQLite(db_path, lectores)
+    pool.abrir()
+    servidor = await asyncio.start_server(ServidorEmpresas(pool).atender, host, port)
+    print(f"Servicio de empresas escuchando en http://{host}:{port}/empresas")
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        await pool.cerrar()
+
+
+# ==============================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON local sobre empresas.db")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--lectores", type=int, default=4,
+                        help="conexiones de solo lectura en el pool")
+    parser.add_argument("--db", default=DB_PATH, help="ruta de la base de datos")
+    args = parser.parse_args()
+    base_datos.DB_PATH = args.db
+    init_db()
+    try:
+        asyncio.run(servir(args.host, args.port, args.lectores, args.db))
+    except KeyboardInterrupt:
+        pass
@@ -1,94 +1,42 @@
 """
 Gestion de Empresas Espanolas
 - Base de datos SQLite con provincia y comunidad autonoma
-- Migracion automatica si la BD ya existia con el campo 'ciudad'
+- Migraciones versionadas (PRAGMA user_version), incluida la del antiguo campo 'ciudad'
 - Mapa geografico real de Espana con provincias (GeoPandas)
 - Zoom a provincia al hacer clic en el mapa
+- Vistas de provincia cacheadas (LRU) y precargadas en segundo plano
 - Interfaz tkinter
 """
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 import webbrowser
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.collections import PathCollection
+from matplotlib.path import Path
+import numpy as np
 import geopandas as gpd
+from shapely.geometry.polygon import orient
 import os
 import zipfile
 import urllib.request
-import pathlib
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from base_datos import (
+    PROVINCIAS, NOMBRES_PROVINCIAS, SECTORES, init_db,
+    get_all, get_empresa, get_en_bbox, get_sectores, contar_por_provincia,
+    insert_empresa, update_empresa, delete_empresa,
+)
 
 # ==============================================================
-# DATOS GEOGRAFICOS: provincias y sus comunidades autonomas
+# COLORES POR SECTOR
 # ==============================================================
-# Cada entrada: "Nombre provincia": ("Comunidad Autonoma", longitud, latitud)
-PROVINCIAS = {
-    "A Coruna":          ("Galicia",              -8.4115, 43.3623),
-    "Albacete":          ("Castilla-La Mancha",   -1.8585, 38.9943),
-    "Alicante":          ("Comunidad Valenciana", -0.4810, 38.3452),
-    "Almeria":           ("Andalucia",            -2.4637, 36.8381),
-    "Asturias":          ("Asturias",             -5.8449, 43.3614),
-    "Avila":             ("Castilla y Leon",      -4.7114, 40.6566),
-    "Badajoz":           ("Extremadura",          -6.9706, 38.8794),
-    "Barcelona":         ("Cataluna",              2.1734, 41.3851),
-    "Bizkaia":           ("Pais Vasco",           -2.9253, 43.2630),
-    "Burgos":            ("Castilla y Leon",      -3.6969, 42.3439),
-    "Caceres":           ("Extremadura",          -6.3724, 39.4753),
-    "Cadiz":             ("Andalucia",            -6.2894, 36.5271),
-    "Cantabria":         ("Cantabria",            -3.8044, 43.4623),
-    "Castellon":         ("Comunidad Valenciana", -0.0524, 39.9864),
-    "Ceuta":             ("Ceuta",                -5.3162, 35.8894),
-    "Ciudad Real":       ("Castilla-La Mancha",   -3.9289, 38.9848),
-    "Cordoba":           ("Andalucia",            -4.7794, 37.8882),
-    "Cuenca":            ("Castilla-La Mancha",   -2.1374, 40.0704),
-    "Gipuzkoa":          ("Pais Vasco",           -2.0000, 43.1500),
-    "Girona":            ("Cataluna",              2.8214, 41.9794),
-    "Granada":           ("Andalucia",            -3.5986, 37.1773),
-    "Guadalajara":       ("Castilla-La Mancha",   -3.1614, 40.6322),
-    "Huelva":            ("Andalucia",            -6.9447, 37.2614),
-    "Huesca":            ("Aragon",               -0.4082, 42.1401),
-    "Illes Balears":     ("Islas Baleares",        2.6502, 39.5696),
-    "Jaen":              ("Andalucia",            -3.7903, 37.7796),
-    "La Rioja":          ("La Rioja",             -2.4450, 42.4650),
-    "Las Palmas":        ("Canarias",            -15.4138, 28.1235),
-    "Leon":              ("Castilla y Leon",      -5.5671, 42.5987),
-    "Lleida":            ("Cataluna",              0.6217, 41.6148),
-    "Lugo":              ("Galicia",              -7.5560, 43.0097),
-    "Madrid":            ("Madrid",               -3.7038, 40.4168),
-    "Malaga":            ("Andalucia",            -4.4214, 36.7213),
-    "Melilla":           ("Melilla",              -2.9388, 35.2923),
-    "Murcia":            ("Murcia",               -1.1307, 37.9922),
-    "Navarra":           ("Navarra",              -1.6440, 42.8125),
-    "Ourense":           ("Galicia",              -7.8640, 42.3360),
-    "Palencia":          ("Castilla y Leon",      -4.5288, 42.0097),
-    "Pontevedra":        ("Galicia",              -8.6455, 42.4337),
-    "Salamanca":         ("Castilla y Leon",      -5.6640, 40.9701),
-    "Santa Cruz de Tenerife": ("Canarias",       -16.2519, 28.4636),
-    "Segovia":           ("Castilla y Leon",      -4.1184, 40.9429),
-    "Sevilla":           ("Andalucia",            -5.9845, 37.3891),
-    "Soria":             ("Castilla y Leon",      -2.4638, 41.7636),
-    "Tarragona":         ("Cataluna",              1.2445, 41.1189),
-    "Teruel":            ("Aragon",               -1.1065, 40.3456),
-    "Toledo":            ("Castilla-La Mancha",   -4.0273, 39.8628),
-    "Valencia":          ("Comunidad Valenciana", -0.3763, 39.4699),
-    "Valladolid":        ("Castilla y Leon",      -4.7245, 41.6523),
-    "Zamora":            ("Castilla y Leon",      -5.7448, 41.5036),
-    "Zaragoza":          ("Aragon",               -0.8773, 41.6561),
-    "Alava":             ("Pais Vasco",           -2.6726, 42.8467),
-    "Otra":              (None,                    None,   None),
-}
-
-NOMBRES_PROVINCIAS = list(PROVINCIAS.keys())
-
-SECTORES = [
-    "Satelites", "Defensa y Espacio",
-    "Comunicaciones", "Aeronautica",
-    "Tecnologia", "Consultoria",
-    "Energia", "Otro"
-]
-
 SECTOR_COLORES = {
     "Satelites":         "#efd90d",
     "Defensa y Espacio": "#ef0dd1",
@@ -100,8 +48,6 @@ SECTOR_COLORES = {
     "Otro":              "#aaaaaa",
 }
 
-DB_PATH = str(pathlib.Path(__file__).parent / "empresas.db")
-
 # ==============================================================
 # GEODATOS DE PROVINCIAS ESPANOLAS
 # ==============================================================
@@ -136,110 +82,124 @@ def load_geodata():
         return None
 
 # ==============================================================
-# BASE DE DATOS + MIGRACION AUTOMATICA
+# VISTAS DE PROVINCIA: registros precalculados + cache LRU
 # ==============================================================
-def init_db():
+CACHE_VISTAS_BYTES  = 64 * 1024 * 1024   # memoria maxima para vistas renderizadas
+VISTA_LADO_PX       = 900                # lado mayor de cada vista, en pixeles
+PREFETCH_POLL_MS    = 50                 # cada cuanto se recogen las vistas precargadas
+PREFETCH_POPULARES  = 6                  # provincias con mas empresas a precargar
+PREFETCH_VECINAS    = 4                  # vecinas a precargar tras cada zoom
+
+# Provincias cuyo nombre en la BD no coincide con NAME_2 de GADM
+# ni quitando tildes
+_ALIAS_GADM = {
+    "illes balears": "baleares",
+    "bizkaia":       "vizcaya",
+    "gipuzkoa":      "guipuzcoa",
+}
+
+def _clave_provincia(nombre):
+    """Clave comparable entre los nombres de PROVINCIAS y NAME_2: sin tildes y en minusculas."""
+    clave = unicodedata.normalize("NFKD", nombre or "").encode("ascii", "ignore").decode().lower().strip()
+    return _ALIAS_GADM.get(clave, clave)
+
+def _bbox_con_margen(b):
+    mx = max((b[2] - b[0]) * 0.15, 0.2)
+    my = max((b[3] - b[1]) * 0.15, 0.2)
+    return (b[0]-mx, b[1]-my, b[2]+mx, b[3]+my)
+
+def indexar_provincias(gdf):
     """
-    Crea la tabla si no existe.
-    Si ya existia con el campo 'ciudad' (version antigua),
-    la migra anadiendo 'provincia' y 'comunidad' sin borrar datos.
+    Agrupa el GeoDataFrame por NAME_2 una sola vez. Cada registro guarda
+    las geometrias de la provincia, su bounding box exacto y el bbox con
+    margen usado para el zoom.
     """
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-
-    # Comprobar si la tabla ya existe
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='empresas'")
-    tabla_existe = cur.fetchone() is not None
-
-    if tabla_existe:
-        # Leer columnas actuales
-        cur.execute("PRAGMA table_info(empresas)")
-        columnas = [row[1] for row in cur.fetchall()]
-
-        # --- MIGRACION: si tiene 'ciudad' pero no 'provincia' ---
-        if "ciudad" in columnas and "provincia" not in columnas:
-            print("Migrando base de datos al nuevo esquema...")
-            # 1. Anadir columnas nuevas
-            cur.execute("ALTER TABLE empresas ADD COLUMN provincia TEXT")
-            cur.execute("ALTER TABLE empresas ADD COLUMN comunidad TEXT")
-            # 2. Copiar 'ciudad' a 'provincia' para no perder el dato
-            cur.execute("UPDATE empresas SET provincia = ciudad")
-            # 3. Intentar rellenar 'comunidad' a partir de la provincia
-            cur.execute("SELECT id, provincia FROM empresas")
-            filas = cur.fetchall()
-            for emp_id, prov in filas:
-                datos = PROVINCIAS.get(prov)
-                if datos and datos[0]:
-                    cur.execute(
-                        "UPDATE empresas SET comunidad=? WHERE id=?",
-                        (datos[0], emp_id)
-                    )
-            con.commit()
-            print("Migracion completada. Revisa las empresas para confirmar provincia/comunidad.")
-
-        # --- MIGRACION: si no tiene latitud/longitud (muy antigua) ---
-        if "latitud" not in columnas:
-            cur.execute("ALTER TABLE empresas ADD COLUMN latitud REAL")
-        if "longitud" not in columnas:
-            cur.execute("ALTER TABLE empresas ADD COLUMN longitud REAL")
-
-    else:
-        # Crear tabla nueva con el esquema completo
-        cur.execute("""
-            CREATE TABLE empresas (
-                id          INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre      TEXT NOT NULL,
-                sector      TEXT,
-                provincia   TEXT,
-                comunidad   TEXT,
-                latitud     REAL NOT NULL,
-                longitud    REAL NOT NULL,
-                link_empleados TEXT
-            )
-        """)
-
-    con.commit()
-    con.close()
-
-def get_all():
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute(
-        "SELECT id, nombre, sector, provincia, comunidad, latitud, longitud, link_empleados "
-        "FROM empresas ORDER BY nombre"
-    )
-    rows = cur.fetchall()
-    con.close()
-    return rows
-
-def insert_empresa(nombre, sector, provincia, comunidad, lat, lon, link):
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute(
-        "INSERT INTO empresas (nombre, sector, provincia, comunidad, latitud, longitud, link_empleados) "
-        "VALUES (?,?,?,?,?,?,?)",
-        (nombre, sector, provincia, comunidad, lat, lon, link)
-    )
-    con.commit()
-    con.close()
-
-def delete_empresa(emp_id):
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute("DELETE FROM empresas WHERE id=?", (emp_id,))
-    con.commit()
-    con.close()
-
-def update_empresa(emp_id, nombre, sector, provincia, comunidad, lat, lon, link):
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute(
-        "UPDATE empresas SET nombre=?, sector=?, provincia=?, comunidad=?, "
-        "latitud=?, longitud=?, link_empleados=? WHERE id=?",
-        (nombre, sector, provincia, comunidad, lat, lon, link, emp_id)
-    )
-    con.commit()
-    con.close()
+    registros = {}
+    for nombre, subset in gdf.groupby("NAME_2"):
+        b = tuple(subset.total_bounds)  # (minx, miny, maxx, maxy)
+        registros[nombre] = {
+            "geom":   subset,
+            "bounds": b,
+            "bbox":   _bbox_con_margen(b),
+        }
+    return registros
+
+def _caminos(geometrias):
+    """Convierte poligonos/multipoligonos de shapely en Paths de matplotlib.
+    Los anillos se orientan (exterior antihorario, huecos horarios) para
+    que la regla de relleno respete los huecos."""
+    caminos = []
+    for geom in geometrias:
+        if geom is None or geom.is_empty:
+            continue
+        for poligono in getattr(geom, "geoms", [geom]):
+            if poligono.geom_type != "Polygon":
+                continue
+            poligono = orient(poligono, 1.0)
+            anillos = [poligono.exterior, *poligono.interiors]
+            caminos.append(Path.make_compound_path(
+                *[Path(np.asarray(anillo.coords)[:, :2], closed=True) for anillo in anillos]
+            ))
+    return caminos
+
+def render_vista_provincia(gdf, registro, lado_px=VISTA_LADO_PX):
+    """
+    Renderiza fuera de pantalla el fondo del zoom de una provincia
+    (provincias vecinas en gris y la seleccionada resaltada) y lo
+    devuelve como array RGBA que cubre exactamente registro["bbox"].
+    Dibuja las geometrias directamente sobre una Figure privada, sin
+    GeoDataFrame.plot (que en geopandas < 1.0 llama a plt.draw() y toca
+    la figura de Tk), asi que puede ejecutarse en un hilo de trabajo.
+    """
+    x0, y0, x1, y1 = registro["bbox"]
+    escala = lado_px / max(x1 - x0, y1 - y0)
+    fig = Figure(figsize=((x1 - x0) * escala / 100, (y1 - y0) * escala / 100), dpi=100)
+    fig.patch.set_facecolor("#4a90c4")
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.add_collection(PathCollection(
+        _caminos(gdf.cx[x0:x1, y0:y1].geometry),
+        facecolor="#c8c8c8", edgecolor="#999", linewidth=0.5, zorder=1
+    ))
+    ax.add_collection(PathCollection(
+        _caminos(registro["geom"].geometry),
+        facecolor="#e8f0d8", edgecolor="#7a9a60", linewidth=1.2, zorder=2
+    ))
+    ax.set_xlim(x0, x1)
+    ax.set_ylim(y0, y1)
+    ax.set_aspect("auto")
+    ax.axis("off")
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba()).copy()
+
+class CacheVistas:
+    """LRU de vistas renderizadas (arrays RGBA) limitada por memoria en bytes."""
+
+    def __init__(self, max_bytes=CACHE_VISTAS_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes     = 0
+        self._vistas   = OrderedDict()
+
+    def __contains__(self, clave):
+        return clave in self._vistas
+
+    def get(self, clave):
+        vista = self._vistas.get(clave)
+        if vista is not None:
+            self._vistas.move_to_end(clave)
+        return vista
+
+    def put(self, clave, vista):
+        if vista.nbytes > self.max_bytes:
+            return
+        anterior = self._vistas.pop(clave, None)
+        if anterior is not None:
+            self.bytes -= anterior.nbytes
+        self._vistas[clave] = vista
+        self.bytes += vista.nbytes
+        while self.bytes > self.max_bytes:
+            _, expulsada = self._vistas.popitem(last=False)
+            self.bytes -= expulsada.nbytes
 
 # ==============================================================
 # APLICACION PRINCIPAL
@@ -257,6 +217,11 @@ class App(tk.Tk):
         self._empresa_data   = []
         self._gdf            = None
         self._zoomed_prov    = None   # None = vista completa; str = NAME_2 en zoom
+        self._provincias_geo = {}     # NAME_2 -> registro de indexar_provincias
+        self._cache_vistas   = CacheVistas()
+        self._prefetch_exec  = ThreadPoolExecutor(1, thread_name_prefix="prefetch")
+        self._prefetch_futs  = {}     # NAME_2 -> Future con la vista en preparacion
+        self._prefetch_job   = None
 
         self._build_ui()
 
@@ -267,9 +232,12 @@ class App(tk.Tk):
                 "No se pudo descargar el mapa de provincias.\n"
                 "Comprueba tu conexion a internet y reinicia el programa."
             )
+        else:
+            self._provincias_geo = indexar_provincias(self._gdf)
 
         self._draw_map()
         self._refresh_table()
+        self._programar_prefetch(self._provincias_populares())
 
     # ----------------------------------------------------------
     # INTERFAZ
@@ -415,16 +383,9 @@ class App(tk.Tk):
     # ZOOM POR PROVINCIA
     # ----------------------------------------------------------
     def _bbox_provincia(self, nombre_provincia):
-        """Calcula el bounding box de una provincia con margen."""
-        if self._gdf is None:
-            return None
-        subset = self._gdf[self._gdf["NAME_2"] == nombre_provincia]
-        if subset.empty:
-            return None
-        b = subset.total_bounds  # [minx, miny, maxx, maxy]
-        mx = max((b[2] - b[0]) * 0.15, 0.2)
-        my = max((b[3] - b[1]) * 0.15, 0.2)
-        return (b[0]-mx, b[1]-my, b[2]+mx, b[3]+my)
+        """Bounding box precalculado de una provincia con margen."""
+        reg = self._provincias_geo.get(nombre_provincia)
+        return reg["bbox"] if reg else None
 
     def _provincia_en_punto(self, x, y):
         """Devuelve el NAME_2 de la provincia donde cayo el clic, o None."""
@@ -432,11 +393,91 @@ class App(tk.Tk):
             return None
         from shapely.geometry import Point
         pt = Point(x, y)
-        for _, row in self._gdf.iterrows():
-            if row.geometry and row.geometry.contains(pt):
-                return row["NAME_2"]
+        for nombre, reg in self._provincias_geo.items():
+            b = reg["bounds"]
+            if not (b[0] <= x <= b[2] and b[1] <= y <= b[3]):
+                continue
+            for geom in reg["geom"].geometry:
+                if geom and geom.contains(pt):
+                    return nombre
         return None
 
+    def _vista_provincia(self, nombre):
+        """Fondo renderizado del zoom a una provincia, desde la cache si existe.
+        Nunca espera al hilo de precarga: si su render ya termino se
+        aprovecha, y si no (o fallo) se renderiza aqui mismo."""
+        vista = self._cache_vistas.get(nombre)
+        if vista is not None:
+            return vista
+        fut = self._prefetch_futs.pop(nombre, None)
+        if fut is not None and fut.done() and not fut.cancelled() and fut.exception() is None:
+            vista = fut.result()
+        else:
+            if fut is not None:
+                fut.cancel()
+            vista = render_vista_provincia(self._gdf, self._provincias_geo[nombre])
+        self._cache_vistas.put(nombre, vista)
+        return vista
+
+    # ----------------------------------------------------------
+    # PRECARGA DE VISTAS EN SEGUNDO PLANO
+    # ----------------------------------------------------------
+    def _vecinas(self, nombre):
+        """Provincias cuyo bbox toca el de 'nombre', de la mas cercana a la mas lejana."""
+        b = self._provincias_geo[nombre]["bounds"]
+        cx, cy = (b[0] + b[2]) / 2, (b[1] + b[3]) / 2
+        vecinas = []
+        for otra, reg in self._provincias_geo.items():
+            o = reg["bounds"]
+            if otra == nombre or o[0] > b[2] or o[2] < b[0] or o[1] > b[3] or o[3] < b[1]:
+                continue
+            d = ((o[0] + o[2]) / 2 - cx)**2 + ((o[1] + o[3]) / 2 - cy)**2
+            vecinas.append((d, otra))
+        return [otra for _, otra in sorted(vecinas)][:PREFETCH_VECINAS]
+
+    def _provincias_populares(self):
+        """Provincias con mas empresas registradas, candidatas a recibir el primer clic."""
+        por_clave = {_clave_provincia(nombre): nombre for nombre in self._provincias_geo}
+        conteo = {}
+        for provincia, n in contar_por_provincia().items():
+            nombre = por_clave.get(_clave_provincia(provincia))
+            if nombre:
+                conteo[nombre] = conteo.get(nombre, 0) + n
+        return sorted(conteo, key=conteo.get, reverse=True)[:PREFETCH_POPULARES]
+
+    def _programar_prefetch(self, nombres):
+        """Renderiza en un hilo de trabajo las vistas de 'nombres' que falten.
+        Lo que quedaba pendiente de una peticion anterior se cancela."""
+        pendientes = [n for n in nombres if n in self._provincias_geo and n not in self._cache_vistas]
+        for nombre in list(self._prefetch_futs):
+            if nombre not in pendientes and self._prefetch_futs[nombre].cancel():
+                del self._prefetch_futs[nombre]
+        for nombre in pendientes:
+            if nombre not in self._prefetch_futs:
+                self._prefetch_futs[nombre] = self._prefetch_exec.submit(
+                    render_vista_provincia, self._gdf, self._provincias_geo[nombre]
+                )
+        if self._prefetch_futs and self._prefetch_job is None:
+            self._prefetch_job = self.after(PREFETCH_POLL_MS, self._prefetch_recoger)
+
+    def _prefetch_recoger(self):
+        """Pasa a la cache (en el hilo de Tk) las vistas que el hilo ya termino."""
+        self._prefetch_job = None
+        for nombre, fut in list(self._prefetch_futs.items()):
+            if not fut.done():
+                continue
+            del self._prefetch_futs[nombre]
+            if not fut.cancelled() and fut.exception() is None:
+                self._cache_vistas.put(nombre, fut.result())
+        if self._prefetch_futs:
+            self._prefetch_job = self.after(PREFETCH_POLL_MS, self._prefetch_recoger)
+
+    def destroy(self):
+        for fut in self._prefetch_futs.values():
+            fut.cancel()
+        self._prefetch_exec.shutdown(wait=False)
+        super().destroy()
+
     # ----------------------------------------------------------
     # DIBUJO DEL MAPA
     # ----------------------------------------------------------
@@ -447,16 +488,13 @@ class App(tk.Tk):
 
         if self._gdf is not None:
             if self._zoomed_prov:
-                # Todas las provincias en gris
-                self._gdf.plot(ax=self.ax, color="#c8c8c8", edgecolor="#999", linewidth=0.5, zorder=1)
-                # Provincia seleccionada en verde
-                subset = self._gdf[self._gdf["NAME_2"] == self._zoomed_prov]
-                subset.plot(ax=self.ax, color="#e8f0d8", edgecolor="#7a9a60", linewidth=1.2, zorder=2)
-                # Zoom al bbox de la provincia
+                # Fondo ya renderizado (vecinas en gris, seleccionada en verde)
                 bbox = self._bbox_provincia(self._zoomed_prov)
-                if bbox:
-                    self.ax.set_xlim(bbox[0], bbox[2])
-                    self.ax.set_ylim(bbox[1], bbox[3])
+                self.ax.imshow(self._vista_provincia(self._zoomed_prov),
+                               extent=(bbox[0], bbox[2], bbox[1], bbox[3]), zorder=1)
+                # Zoom al bbox de la provincia
+                self.ax.set_xlim(bbox[0], bbox[2])
+                self.ax.set_ylim(bbox[1], bbox[3])
                 self.lbl_mapa.config(text=f"Provincia: {self._zoomed_prov}")
             else:
                 # Vista completa
@@ -493,7 +531,9 @@ class App(tk.Tk):
         self.canvas.draw()
 
     def _plot_empresas(self):
-        rows = get_all()
+        reg = self._provincias_geo.get(self._zoomed_prov)
+        # En zoom solo se leen las empresas del bbox de la provincia
+        rows = get_en_bbox(reg["bbox"]) if reg is not None else get_all()
         self._empresa_data = []
         xlim = self.ax.get_xlim()
         ylim = self.ax.get_ylim()
@@ -522,7 +562,7 @@ class App(tk.Tk):
         def _normalizar(s):
             return (s or "").replace("é","e").replace("á","a").replace("í","i").replace("ó","o").replace("ú","u")
 
-        sectores_presentes = sorted({r[2] for r in rows if r[2]})
+        sectores_presentes = get_sectores()
         handles = [
             mpatches.Patch(color=SECTOR_COLORES.get(_normalizar(s), SECTOR_COLORES.get(s, "#aaa")), label=s)
             for s in sectores_presentes
@@ -537,6 +577,7 @@ class App(tk.Tk):
     def _reset_zoom(self):
         self._zoomed_prov = None
         self._draw_map()
+        self._programar_prefetch(self._provincias_populares())
 
     def _on_map_click(self, event):
         if event.xdata is None or event.ydata is None:
@@ -570,6 +611,7 @@ class App(tk.Tk):
             else:
                 self._zoomed_prov = prov
                 self._draw_map()
+                self._programar_prefetch(self._vecinas(prov))
 
     # ----------------------------------------------------------
     # CRUD
@@ -688,17 +730,10 @@ class App(tk.Tk):
         emp_id = int(self.tree.item(sel[0], "values")[0])
         self._selected_id = emp_id
 
-        con = sqlite3.connect(DB_PATH)
-        cur = con.cursor()
-        cur.execute(
-            "SELECT nombre, sector, provincia, comunidad, latitud, longitud, link_empleados "
-            "FROM empresas WHERE id=?", (emp_id,)
-        )
-        row = cur.fetchone()
-        con.close()
+        row = get_empresa(emp_id)
 
         if row:
-            nombre, sector, provincia, comunidad, lat, lon, link = row
+            _, nombre, sector, provincia, comunidad, lat, lon, link = row
             self._clear_form()
             self._selected_id = emp_id
             self.ent_nombre.insert(0, nombre or "")